@@ -14,8 +14,8 @@ Pipeline
    d. Map the appropriate wall (support/resistance) to trend.
    e. Fetch option chain → filter by nearest monthly expiry.
    f. Select short + long strikes.
-   g. Fetch option premiums → compute spread P&L.
-3. Return list of trade recommendations.
+3. Fetch every candidate's option premiums in one batch → compute spread P&L.
+4. Return list of trade recommendations.
 
 Usage:
     from analyst.analyst import analyze_candidates
@@ -26,6 +26,8 @@ Usage:
 import logging
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Any
 
 import config
@@ -53,7 +55,7 @@ def analyze_candidates(
     ----------
     candidates : list[dict]
         Output of scanner.run_scan() — each dict has:
-        symbol, score, method, trend, ema_50, spot, current_iv.
+        symbol, score, method, trend, ema_50, spot, current_iv, candles.
     kite : KiteClient
         Authenticated Kite client.
     nse_token_map : dict or None
@@ -71,27 +73,41 @@ def analyze_candidates(
         time.sleep(random.uniform(0.3, 0.8))
         nse_token_map = build_nse_token_map(kite)
 
-    recommendations: list[dict[str, Any]] = []
-
-    for i, candidate in enumerate(candidates, 1):
-        symbol = candidate["symbol"]
-        spot = candidate["spot"]
-        trend = candidate["trend"]
-
-        logger.info(
-            "[%d/%d] Analyzing %s (trend=%s, spot=%.2f) …",
-            i, len(candidates), symbol, trend, spot,
-        )
+    # Candidates are independent and IO-bound; analyze them concurrently.
+    # Results are collected in submission order to keep the score ranking.
+    total = len(candidates)
+    with ThreadPoolExecutor(max_workers=max(1, min(5, total))) as executor:
+        futures = [
+            executor.submit(_analyze_logged, i, candidate, total, kite, nse_token_map)
+            for i, candidate in enumerate(candidates, 1)
+        ]
+        plans = [p for p in (f.result() for f in futures) if p]
 
+    # ── Step 6: Fetch option premiums ──
+    # Market-quote endpoints allow about one request per second, so the
+    # workers stop at strike selection and every leg is priced in one call
+    leg_symbols = [
+        f"NFO:{plan['strike_result'][leg]['tradingsymbol']}"
+        for plan in plans
+        for leg in ("short_instrument", "long_instrument")
+    ]
+    quotes = {}
+    if leg_symbols:
         try:
-            result = _analyze_single(candidate, kite, nse_token_map)
-            if result:
-                recommendations.append(result)
-                logger.info("  ✓ Trade recommendation generated for %s.", symbol)
-            else:
-                logger.info("  ✗ No viable trade for %s.", symbol)
+            quotes = kite.ltp(leg_symbols)
         except Exception as exc:
-            logger.error("  ✗ Error analyzing %s: %s", symbol, exc)
+            logger.warning("  Premium fetch failed: %s", exc)
+            plans = []
+
+    recommendations: list[dict[str, Any]] = []
+    for plan in plans:
+        symbol = plan["candidate"]["symbol"]
+        result = _price_spread(plan, quotes)
+        if result:
+            recommendations.append(result)
+            logger.info("  ✓ Trade recommendation generated for %s.", symbol)
+        else:
+            logger.info("  ✗ No viable trade for %s.", symbol)
 
     logger.info(
         "═══ Analyst complete: %d recommendations from %d candidates ═══",
@@ -100,12 +116,56 @@ def analyze_candidates(
     return recommendations
 
 
+def _analyze_logged(
+    i: int,
+    candidate: dict[str, Any],
+    total: int,
+    kite: KiteClient,
+    nse_token_map: dict[str, int],
+) -> dict[str, Any] | None:
+    """Run _analyze_single() for one candidate, logging failures (runs in thread)."""
+    symbol = candidate["symbol"]
+
+    logger.info(
+        "[%d/%d] Analyzing %s (trend=%s, spot=%.2f) …",
+        i, total, symbol, candidate["trend"], candidate["spot"],
+    )
+
+    try:
+        result = _analyze_single(candidate, kite, nse_token_map)
+    except Exception as exc:
+        logger.error("  ✗ Error analyzing %s: %s", symbol, exc)
+        return None
+
+    if not result:
+        logger.info("  ✗ No viable trade for %s.", symbol)
+    return result
+
+
+def _recent_candles(candles: list[dict] | None, days: int) -> list[dict]:
+    """
+    Trim the scanner's trend candles to the last `days` calendar days.
+
+    The scanner already fetched a longer daily history for the same
+    stock, so slicing it saves one historical-data call per candidate.
+    """
+    if not candles:
+        return []
+    cutoff = (datetime.now() - timedelta(days=days)).date()
+    return [c for c in candles if c["date"].date() >= cutoff]
+
+
 def _analyze_single(
     candidate: dict[str, Any],
     kite: KiteClient,
     nse_token_map: dict[str, int],
 ) -> dict[str, Any] | None:
-    """Analyze a single candidate through the full VP → strike pipeline."""
+    """
+    Analyze a single candidate through the VP → strike pipeline.
+
+    Returns the plan that _price_spread() turns into a recommendation
+    once the leg premiums are fetched, or None if there is no trade.
+    """
     symbol = candidate["symbol"]
     spot = candidate["spot"]
     trend = candidate["trend"]
@@ -116,9 +176,11 @@ def _analyze_single(
         return None
 
     # ── Step 1: Fetch candles ──
-    time.sleep(random.uniform(0.3, 0.8))
-    candles = kite.historical_data(nse_token, "day", config.VP_LOOKBACK_DAYS + 30)
     # Fetch extra days to ensure we have at least VP_LOOKBACK_DAYS valid candles
+    candles = _recent_candles(candidate.get("candles"), config.VP_HISTORY_DAYS)
+    if not candles:
+        time.sleep(random.uniform(0.3, 0.8))
+        candles = kite.historical_data(nse_token, "day", config.VP_HISTORY_DAYS)
 
     if len(candles) < 30:
         logger.warning("  Only %d candles for %s — skipping.", len(candles), symbol)
@@ -171,17 +233,28 @@ def _analyze_single(
     if strike_result is None:
         return None
 
-    # ── Step 6: Fetch option premiums ──
+    return {
+        "candidate": candidate,
+        "profile": profile,
+        "walls": walls,
+        "strike_result": strike_result,
+    }
+
+
+def _price_spread(
+    plan: dict[str, Any],
+    quotes: dict[str, dict],
+) -> dict[str, Any] | None:
+    """Price a planned spread from the batched leg quotes and build the recommendation."""
+    candidate = plan["candidate"]
+    profile = plan["profile"]
+    walls = plan["walls"]
+    strike_result = plan["strike_result"]
+    symbol = candidate["symbol"]
+
     short_sym = f"NFO:{strike_result['short_instrument']['tradingsymbol']}"
     long_sym = f"NFO:{strike_result['long_instrument']['tradingsymbol']}"
 
-    time.sleep(random.uniform(0.3, 0.8))
-    try:
-        quotes = kite.ltp([short_sym, long_sym])
-    except Exception as exc:
-        logger.warning("  Premium fetch failed: %s", exc)
-        return None
-
     short_premium = quotes.get(short_sym, {}).get("last_price", 0)
     long_premium = quotes.get(long_sym, {}).get("last_price", 0)
 
@@ -201,8 +274,8 @@ def _analyze_single(
     # ── Assemble recommendation ──
     return {
         "symbol": symbol,
-        "trend": trend,
-        "spot": spot,
+        "trend": candidate["trend"],
+        "spot": candidate["spot"],
         "score": candidate.get("score"),
         "score_method": candidate.get("method"),
         "current_iv": candidate.get("current_iv"),
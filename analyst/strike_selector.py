@@ -35,6 +35,11 @@ logger = logging.getLogger(__name__)
 # Expiry helpers
 # ──────────────────────────────────────────────
 
+# date.weekday() values for the monthly expiry day and its holiday shift
+WEDNESDAY = 2
+THURSDAY = 3
+
+
 def find_nearest_monthly_expiry(option_chain: list[dict]) -> date | None:
     """
     Identify the nearest monthly expiry from an option chain.
@@ -103,8 +108,8 @@ def _is_last_thursday_of_month(
     and the exchange shifts the expiry to Wednesday — by checking if
     no later expiry exists in the same month.
     """
-    # Is it a Thursday (3) or Wednesday (2)?
-    if exp.weekday() not in (2, 3):
+    # Is it a Thursday or (holiday-shifted) Wednesday?
+    if exp.weekday() not in (WEDNESDAY, THURSDAY):
         return False
 
     # Check there's no later expiry in the same year-month
@@ -175,17 +180,11 @@ def select_strikes(
         return None
 
     # ── Route by trend ──
-    if trend == "Bullish":
-        return _select_bull_put_spread(
-            wall_price, spot, expiry_chain, target_expiry, spread_width_strikes
-        )
-    elif trend == "Bearish":
-        return _select_bear_call_spread(
-            wall_price, spot, expiry_chain, target_expiry, spread_width_strikes
-        )
-    else:
+    builder = _SPREAD_BUILDERS.get(trend)
+    if builder is None:
         logger.warning("Unknown trend '%s' — cannot select strikes.", trend)
         return None
+    return builder(wall_price, spot, expiry_chain, target_expiry, spread_width_strikes)
 
 
 def _filter_by_expiry(
@@ -362,6 +361,13 @@ def _select_bear_call_spread(
     }
 
 
+# Trend → spread builder used by select_strikes()
+_SPREAD_BUILDERS = {
+    "Bullish": _select_bull_put_spread,
+    "Bearish": _select_bear_call_spread,
+}
+
+
 # ──────────────────────────────────────────────
 # Spread P&L
 # ──────────────────────────────────────────────
@@ -16,8 +16,6 @@ Usage:
 """
 
 import logging
-import math
-from collections import defaultdict
 
 import numpy as np
 import pandas as pd
@@ -100,13 +98,17 @@ def calculate_volume_profile(
         logger.warning("Insufficient candles for VP: got %d.", len(candles))
         return None
 
+    # Columnar view of the candles, built once for every pass below
+    ohlcv = pd.DataFrame(candles, columns=["high", "low", "close", "volume"])
+    volumes = ohlcv["volume"].fillna(0.0).to_numpy(dtype=float)
+
     # ── Check Average Daily Volume ──
-    volumes = [c["volume"] for c in candles if c.get("volume", 0) > 0]
-    if not volumes:
+    traded = volumes > 0
+    if not traded.any():
         logger.warning("All candles have zero volume.")
         return None
 
-    adv = sum(volumes) / len(volumes)
+    adv = float(volumes[traded].mean())
     if adv < config.VP_MIN_ADV:
         logger.info(
             "ADV = %.0f < threshold %d — skipping (dead stock).",
@@ -115,37 +117,33 @@ def calculate_volume_profile(
         return None
 
     # ── Compute bin size ──
-    closes = pd.Series([c["close"] for c in candles], dtype=float)
+    closes = ohlcv["close"].astype(float)
     if bin_size is None:
         bin_size = _freedman_diaconis_bin_width(closes)
     logger.debug("Using bin_size = %.2f", bin_size)
 
     # ── Distribute volume across bins ──
-    bins: dict[float, float] = defaultdict(float)
-
-    for candle in candles:
-        high = candle["high"]
-        low = candle["low"]
-        vol = candle.get("volume", 0)
-
-        if vol <= 0 or high <= low:
-            continue
-
-        # Number of bins this candle spans
-        low_bin = math.floor(low / bin_size) * bin_size
-        high_bin = math.floor(high / bin_size) * bin_size
-        num_bins = max(1, round((high_bin - low_bin) / bin_size) + 1)
-        vol_per_bin = vol / num_bins
-
-        price = low_bin
-        while price <= high_bin + bin_size * 0.01:  # small epsilon for float
-            bins[round(price, 2)] += vol_per_bin
-            price += bin_size
-
-    if not bins:
+    highs = ohlcv["high"].to_numpy(dtype=float)
+    lows = ohlcv["low"].to_numpy(dtype=float)
+    spans = (volumes > 0) & (highs > lows)
+
+    # Number of bins each candle spans
+    low_bins = np.floor(lows[spans] / bin_size) * bin_size
+    high_bins = np.floor(highs[spans] / bin_size) * bin_size
+    num_bins = np.maximum(1, np.round((high_bins - low_bins) / bin_size).astype(int) + 1)
+
+    # One row per (candle, bin) pair, then sum volume per bin price
+    offsets = np.arange(num_bins.sum()) - np.repeat(np.cumsum(num_bins) - num_bins, num_bins)
+    prices = np.round(np.repeat(low_bins, num_bins) + offsets * bin_size, 2)
+    vol_per_bin = np.repeat(volumes[spans] / num_bins, num_bins)
+    binned = pd.Series(vol_per_bin).groupby(prices).sum()
+
+    if binned.empty:
         logger.warning("No volume bins generated.")
         return None
 
+    # groupby sorts its keys; the value area and HVN scans rely on price order
+    bins: dict[float, float] = dict(zip(binned.index.tolist(), binned.tolist()))
     total_volume = sum(bins.values())
 
     # ── Point of Control (POC) ──
@@ -155,7 +153,7 @@ def calculate_volume_profile(
     va_high, va_low = _compute_value_area(bins, poc_price, bin_size, total_volume)
 
     return {
-        "bins": dict(sorted(bins.items())),
+        "bins": bins,
         "poc": poc_price,
         "va_high": va_high,
         "va_low": va_low,
@@ -176,11 +174,12 @@ def _compute_value_area(
 
     Alternately expands up and down, always taking the side that
     adds more volume, matching the standard TPO value area algorithm.
+    `bins` must be keyed in ascending price order.
     """
     target_volume = total_volume * (config.VP_VALUE_AREA_PCT / 100.0)
     accumulated = bins.get(poc, 0.0)
 
-    sorted_prices = sorted(bins.keys())
+    sorted_prices = list(bins)
     poc_idx = min(range(len(sorted_prices)), key=lambda i: abs(sorted_prices[i] - poc))
 
     upper_idx = poc_idx + 1
@@ -249,7 +248,8 @@ def find_hvn_walls(
     mean_vol = sum(bins.values()) / len(bins)
     hvn_threshold = mean_vol * config.VP_HVN_MULTIPLIER
 
-    all_hvns = sorted([price for price, vol in bins.items() if vol >= hvn_threshold])
+    # Profile bins are already in price order, so the HVNs are too
+    all_hvns = [price for price, vol in bins.items() if vol >= hvn_threshold]
 
     # Nearest HVN below spot (support)
     support_candidates = [p for p in all_hvns if p < spot_price]
@@ -53,6 +53,7 @@ IVP_THRESHOLD = 50                   # Min IVP % to qualify
 # Volume Profile (Chunk 3)
 # ──────────────────────────────────────────────
 VP_LOOKBACK_DAYS = 60                # Days of candles for VP calculation
+VP_HISTORY_DAYS = VP_LOOKBACK_DAYS + 30  # Calendar days fetched to cover them
 VP_VALUE_AREA_PCT = 70               # Value Area accumulates this % of volume
 VP_HVN_MULTIPLIER = 1.5             # HVN >= this × mean-bin-volume
 VP_MIN_ADV = 500_000                 # Min Avg Daily Volume (skip dead stocks)
@@ -76,5 +77,8 @@ SPREAD_TARGET_PCT = 50               # Target at 50% of credit collected
 # ──────────────────────────────────────────────
 MAX_API_RETRIES = 5
 API_BACKOFF_BASE_SECONDS = 2         # Exponential backoff base
+INSTRUMENTS_CACHE_TTL_SECONDS = 6 * 60 * 60  # Instrument dump changes once a day
+MARGINS_CACHE_TTL_SECONDS = 15       # Reuse account margins between orders
+KITE_HTTP_POOL_SIZE = 10             # Keep-alive connections; >= scanner worker threads
 BID_ASK_SPREAD_LIMIT_PCT = 5         # Skip if spread > 5%
 NIFTY_CRASH_THRESHOLD_PCT = 2        # Kill switch if Nifty down > 2%
@@ -19,11 +19,29 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from kiteconnect import KiteConnect
+from kiteconnect.exceptions import TokenException
 
 import config
 
+# TokenException is re-exported so session probes need not import kiteconnect
+__all__ = ["KiteClient", "TokenException", "is_rate_limit_error"]
+
 logger = logging.getLogger(__name__)
 
+# Kite rate-limit errors surface as NetworkException or InputException
+# with one of these substrings in the message.
+_RATE_LIMIT_MARKERS = ("Too many requests", "Rate limit")
+
+# Maximum instruments Kite accepts in one market-quote request
+_LTP_BATCH_LIMIT = 1000
+_QUOTE_BATCH_LIMIT = 500
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """Return True if a Kite API exception is a rate-limit rejection."""
+    message = str(exc)
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
 
 class KiteClient:
     """Thin wrapper around KiteConnect with retry logic."""
@@ -34,12 +52,25 @@ class KiteClient:
                 "KITE_API_KEY is not set. "
                 "Export it as an environment variable or update config.py."
             )
-        self._kite = KiteConnect(api_key=config.KITE_API_KEY)
+        # One keep-alive connection per concurrent worker, so threaded
+        # scans reuse TLS connections instead of discarding overflow ones
+        self._kite = KiteConnect(
+            api_key=config.KITE_API_KEY,
+            pool={
+                "pool_connections": 1,  # every call goes to api.kite.trade
+                "pool_maxsize": config.KITE_HTTP_POOL_SIZE,
+            },
+        )
 
         # If an access token is already available, set it immediately
         if config.KITE_ACCESS_TOKEN:
             self._kite.set_access_token(config.KITE_ACCESS_TOKEN)
 
+        # exchange -> (fetched_at, instruments); see instruments()
+        self._instruments_cache: dict[str, tuple[float, list[dict]]] = {}
+        # (fetched_at, margins); see margins()
+        self._margins_cache: tuple[float, dict] | None = None
+
     # ── Session helpers ────────────────────────
 
     def get_login_url(self) -> str:
@@ -96,8 +127,20 @@ class KiteClient:
         )
 
     def instruments(self, exchange: str = "NFO") -> list[dict]:
-        """Fetch the full instrument master for an exchange."""
-        return self._api_call_with_retry(self._kite.instruments, exchange)
+        """
+        Fetch the full instrument master for an exchange.
+
+        The dump is several MB and only changes once a day, so it is
+        cached per exchange for config.INSTRUMENTS_CACHE_TTL_SECONDS.
+        Callers must treat the returned list as read-only.
+        """
+        cached = self._instruments_cache.get(exchange)
+        if cached and time.monotonic() - cached[0] < config.INSTRUMENTS_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        instruments = self._api_call_with_retry(self._kite.instruments, exchange)
+        self._instruments_cache[exchange] = (time.monotonic(), instruments)
+        return instruments
 
     def ltp(self, symbols: list[str]) -> dict:
         """
@@ -112,15 +155,31 @@ class KiteClient:
         -------
         dict  — keyed by symbol, value contains 'last_price'.
         """
-        return self._api_call_with_retry(self._kite.ltp, symbols)
+        return self._batched_call(self._kite.ltp, symbols, _LTP_BATCH_LIMIT)
 
     def quote(self, symbols: list[str]) -> dict:
         """Fetch full quote (bid/ask/oi/volume etc.) for symbols."""
-        return self._api_call_with_retry(self._kite.quote, symbols)
+        return self._batched_call(self._kite.quote, symbols, _QUOTE_BATCH_LIMIT)
 
     def margins(self) -> dict:
-        """Fetch account margins (equity + commodity)."""
-        return self._api_call_with_retry(self._kite.margins)
+        """
+        Fetch account margins (equity + commodity).
+
+        Margins only move when orders are placed or cancelled, so the
+        result is reused for config.MARGINS_CACHE_TTL_SECONDS and dropped
+        by place_order() / cancel_order().
+        """
+        cached = self._margins_cache
+        if cached and time.monotonic() - cached[0] < config.MARGINS_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        margins = self._api_call_with_retry(self._kite.margins)
+        self._margins_cache = (time.monotonic(), margins)
+        return margins
+
+    def basket_margins(self, orders: list[dict]) -> dict:
+        """Fetch the margin required for a basket of orders (with hedge benefit)."""
+        return self._api_call_with_retry(self._kite.basket_order_margins, orders)
 
     def positions(self) -> dict:
         """Fetch current day and net positions."""
@@ -130,21 +189,45 @@ class KiteClient:
 
     def place_order(self, **kwargs) -> str:
         """Place an order and return the order_id."""
-        return self._api_call_with_retry(
-            self._kite.place_order,
-            variety=kwargs.pop("variety", self._kite.VARIETY_REGULAR),
-            **kwargs,
-        )
+        try:
+            return self._api_call_with_retry(
+                self._kite.place_order,
+                variety=kwargs.pop("variety", self._kite.VARIETY_REGULAR),
+                **kwargs,
+            )
+        finally:
+            self._margins_cache = None  # blocked margin has changed
 
     def cancel_order(self, order_id: str, variety: str | None = None) -> str:
         """Cancel an open order."""
         variety = variety or self._kite.VARIETY_REGULAR
-        return self._api_call_with_retry(
-            self._kite.cancel_order, variety, order_id
-        )
+        try:
+            return self._api_call_with_retry(
+                self._kite.cancel_order, variety, order_id
+            )
+        finally:
+            self._margins_cache = None  # blocked margin has changed
 
     # ── Internal helpers ───────────────────────
 
+    def _batched_call(self, func, symbols: list[str], limit: int) -> dict:
+        """
+        Call a market-quote endpoint in as few requests as Kite allows.
+
+        Chunks run one after another: the quote endpoints are limited to
+        about one request per second, so parallel chunks would only be
+        rate limited. Duplicate symbols (e.g. two trades sharing a leg)
+        are requested once.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if len(symbols) <= limit:
+            return self._api_call_with_retry(func, symbols)
+
+        merged: dict = {}
+        for start in range(0, len(symbols), limit):
+            merged.update(self._api_call_with_retry(func, symbols[start:start + limit]))
+        return merged
+
     def _api_call_with_retry(self, func, *args, **kwargs) -> Any:
         """
         Execute an API call with exponential backoff on rate-limit errors.
@@ -155,9 +238,7 @@ class KiteClient:
             try:
                 return func(*args, **kwargs)
             except Exception as exc:
-                # Kite rate-limit errors surface as NetworkException or
-                # InputException with specific messages.
-                if "Too many requests" in str(exc) or "Rate limit" in str(exc):
+                if is_rate_limit_error(exc):
                     wait = config.API_BACKOFF_BASE_SECONDS ** attempt
                     logger.warning(
                         "Rate limited (attempt %d/%d). Retrying in %ds …",
@@ -22,14 +22,17 @@ import logging
 import math
 import random
 import time
+from collections import defaultdict
 from datetime import datetime
+from pathlib import Path
 
 import schedule
+from dotenv import set_key
 
 import config
 from core.iv_calculator import implied_volatility
 from core.hv_calculator import calculate_hv
-from core.kite_client import KiteClient
+from core.kite_client import KiteClient, is_rate_limit_error
 from db.connection import get_connection
 from db.schema import initialise_database
 
@@ -80,27 +83,30 @@ def _get_fno_symbols(kite: KiteClient) -> list[dict]:
     return fno_stocks
 
 
-def _find_atm_option(
+def _build_option_index(
     kite: KiteClient,
-    stock_symbol: str,
-    spot_price: float,
     option_type: str = "CE",
-) -> dict | None:
+) -> dict[str, list[dict]]:
     """
-    Find the nearest ATM option instrument for a given underlying.
+    Group NFO option instruments of one type by underlying name.
+
+    Built once per snapshot so each stock's ATM lookup scans only its
+    own options instead of the whole NFO dump.
+    """
+    index: dict[str, list[dict]] = defaultdict(list)
+    for inst in kite.instruments("NFO"):
+        if inst.get("instrument_type") == option_type:
+            index[inst.get("name")].append(inst)
+    return index
 
-    Fetches all NFO instruments, filters by the underlying name and
-    option type, and returns the one whose strike is closest to spot.
 
-    Returns the instrument dict or None if nothing found.
+def _find_atm_option(options: list[dict], spot_price: float) -> dict | None:
     """
-    instruments = kite.instruments("NFO")
-    options = [
-        inst for inst in instruments
-        if inst.get("name") == stock_symbol
-        and inst.get("instrument_type") == option_type
-    ]
+    Return the option whose strike is closest to spot.
 
+    `options` is one underlying's entry from _build_option_index().
+    Returns None if the list is empty.
+    """
     if not options:
         return None
 
@@ -212,8 +218,6 @@ def run_iv_snapshot() -> None:
 
         # Step 3: Persist to .env so next run auto-connects
         try:
-            from dotenv import set_key
-            from pathlib import Path
             env_path = Path(__file__).resolve().parent / ".env"
             set_key(str(env_path), "KITE_ACCESS_TOKEN", access_token)
             logger.info("✓ Access token saved to .env")
@@ -248,6 +252,44 @@ def run_iv_snapshot() -> None:
             nse_token_map[inst["tradingsymbol"]] = inst["instrument_token"]
     logger.info("✓ NSE instrument map built (%d symbols).", len(nse_token_map))
 
+    # ── Pre-fetch spot and ATM option prices in two batched calls ──
+    # Taking both snapshots together keeps each spot/premium pair used for
+    # IV within about a second, rather than one round-trip pair per stock.
+    # The option index is built first so only dict lookups sit between them.
+    pending = [s["symbol"] for s in fno_stocks if s["symbol"] not in already_done]
+    try:
+        ce_options = _build_option_index(kite, "CE")
+    except Exception as exc:
+        logger.error("Failed to build NFO option index: %s", exc)
+        return
+
+    try:
+        spot_data = kite.ltp([f"NSE:{sym}" for sym in pending]) if pending else {}
+    except Exception as exc:
+        logger.error("Failed to fetch spot prices: %s", exc)
+        return
+
+    # ATM lookup is per stock: a failure skips that stock, not the snapshot
+    atm_options: dict[str, dict] = {}
+    for sym in pending:
+        spot = spot_data.get(f"NSE:{sym}", {}).get("last_price")
+        if not spot:
+            continue
+        try:
+            option = _find_atm_option(ce_options.get(sym, []), spot)
+        except Exception as exc:
+            logger.warning("  ⚠ ATM option lookup failed for %s: %s", sym, exc)
+            continue
+        if option:
+            atm_options[sym] = option
+
+    try:
+        opt_keys = [f"NFO:{opt['tradingsymbol']}" for opt in atm_options.values()]
+        opt_data = kite.ltp(opt_keys) if opt_keys else {}
+    except Exception as exc:
+        logger.error("Failed to fetch option prices: %s", exc)
+        return
+
     success_count = 0
     skip_count = 0
     resume_skip = 0
@@ -263,27 +305,23 @@ def run_iv_snapshot() -> None:
         logger.info("[%d/%d] Processing %s …", i, len(fno_stocks), symbol)
 
         try:
-            # 1. Get spot price
-            time.sleep(random.uniform(0.3, 0.8))
-            ltp_data = kite.ltp([f"NSE:{symbol}"])
-            spot = ltp_data.get(f"NSE:{symbol}", {}).get("last_price")
+            # 1. Get spot price (pre-fetched above)
+            spot = spot_data.get(f"NSE:{symbol}", {}).get("last_price")
             if not spot:
                 logger.warning("  ✗ No LTP for %s — skipping.", symbol)
                 skip_count += 1
                 continue
 
-            # 2. Find ATM CE option
-            atm_option = _find_atm_option(kite, symbol, spot, "CE")
+            # 2. Find ATM CE option (resolved above)
+            atm_option = atm_options.get(symbol)
             if not atm_option:
                 logger.warning("  ✗ No ATM option found for %s — skipping.", symbol)
                 skip_count += 1
                 continue
 
-            # 3. Get option market price
-            time.sleep(random.uniform(0.3, 0.8))
+            # 3. Get option market price (pre-fetched above)
             opt_key = f"NFO:{atm_option['tradingsymbol']}"
-            opt_quote = kite.ltp([opt_key])
-            opt_price = opt_quote.get(opt_key, {}).get("last_price")
+            opt_price = opt_data.get(opt_key, {}).get("last_price")
             if not opt_price or opt_price <= 0:
                 logger.warning("  ✗ No valid option price for %s — skipping.", symbol)
                 skip_count += 1
@@ -319,9 +357,8 @@ def run_iv_snapshot() -> None:
             success_count += 1
 
         except Exception as exc:
-            err_msg = str(exc)
             # ── Handle rate-limit: back off instead of skipping ──
-            if "Too many requests" in err_msg or "Rate limit" in err_msg:
+            if is_rate_limit_error(exc):
                 wait = random.uniform(8, 20)
                 logger.warning(
                     "  ⏳ Rate limited on %s — backing off %.1fs …",
@@ -10,6 +10,8 @@ Run this module directly to initialise the database:
     python -m db.schema
 """
 
+from datetime import date
+
 from db.connection import get_connection
 
 # ──────────────────────────────────────────────
@@ -33,7 +35,7 @@ CREATE TABLE IF NOT EXISTS trade_log (
     trade_id      TEXT    NOT NULL UNIQUE,        -- UUID
     symbol        TEXT    NOT NULL,
     strategy      TEXT    NOT NULL,               -- BULL_PUT | BEAR_CALL
-    status        TEXT    NOT NULL DEFAULT 'OPEN',-- OPEN | CLOSED | ERROR
+    status        TEXT    NOT NULL DEFAULT 'OPEN',-- OPEN | CLOSING | CLOSED | ERROR
     mode          TEXT    NOT NULL DEFAULT 'PAPER', -- PAPER | LIVE
     
     -- Entry Details
@@ -42,6 +44,8 @@ CREATE TABLE IF NOT EXISTS trade_log (
     long_strike   REAL    NOT NULL,
     expiry        TEXT    NOT NULL,               -- YYYY-MM-DD
     lot_size      INTEGER NOT NULL,
+    short_symbol  TEXT,                           -- NFO tradingsymbol of short leg
+    long_symbol   TEXT,                           -- NFO tradingsymbol of long leg
     
     -- Pricing & P&L
     entry_short_pr REAL   NOT NULL,               -- Premium received
@@ -70,6 +74,51 @@ _CREATE_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_trade_st  ON trade_log(status);",
 ]
 
+# Columns added after the first release: name → ALTER TABLE DDL
+_TRADE_LOG_MIGRATIONS = {
+    "short_symbol": "ALTER TABLE trade_log ADD COLUMN short_symbol TEXT;",
+    "long_symbol":  "ALTER TABLE trade_log ADD COLUMN long_symbol TEXT;",
+}
+
+
+# ──────────────────────────────────────────────
+# Migrations
+# ──────────────────────────────────────────────
+
+def _leg_tradingsymbol(symbol: str, expiry: str, strike: float, strategy: str) -> str:
+    """Monthly NFO tradingsymbol, e.g. NIFTY23OCT18000CE."""
+    exp = date.fromisoformat(expiry)
+    leg_type = "PE" if "PUT" in strategy else "CE"
+    mon = exp.strftime("%b").upper()  # JAN, FEB...
+    return f"{symbol}{exp:%y}{mon}{int(strike)}{leg_type}"
+
+
+def _migrate_trade_log(conn) -> None:
+    """Add missing trade_log columns and backfill leg symbols of old trades."""
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(trade_log)")}
+    for column, ddl in _TRADE_LOG_MIGRATIONS.items():
+        if column not in existing:
+            conn.execute(ddl)
+
+    rows = conn.execute(
+        "SELECT trade_id, symbol, strategy, expiry, short_strike, long_strike "
+        "FROM trade_log WHERE short_symbol IS NULL OR long_symbol IS NULL"
+    ).fetchall()
+    updates = []
+    for r in rows:
+        try:
+            updates.append((
+                _leg_tradingsymbol(r["symbol"], r["expiry"], r["short_strike"], r["strategy"]),
+                _leg_tradingsymbol(r["symbol"], r["expiry"], r["long_strike"], r["strategy"]),
+                r["trade_id"],
+            ))
+        except ValueError:
+            print(f"[db] Cannot backfill leg symbols for trade {r['trade_id']}: bad expiry {r['expiry']!r}")
+    conn.executemany(
+        "UPDATE trade_log SET short_symbol = ?, long_symbol = ? WHERE trade_id = ?",
+        updates,
+    )
+
 
 # ──────────────────────────────────────────────
 # Public API
@@ -80,6 +129,7 @@ def initialise_database() -> None:
     with get_connection() as conn:
         conn.execute(_CREATE_IV_HISTORY)
         conn.execute(_CREATE_TRADE_LOG)
+        _migrate_trade_log(conn)
         for idx_sql in _CREATE_INDEXES:
             conn.execute(idx_sql)
     print("[db] Database initialised successfully.")
@@ -40,42 +40,57 @@ def execute_trades(
     logger.info("═══ Starting Execution Phase ═══")
     
     # ── 1. Global Safety Checks ──
-    if not check_nifty_crash(kite):
-        logger.critical("Global Safety Triggered (Nifty Crash). Aborting all trades.")
-        return 0
-        
-    # Check max open trades
-    current_open = _get_open_trade_count()
-    if current_open >= config.MAX_OPEN_TRADES:
+    # Local DB checks run first so a full or duplicate-only batch never
+    # touches Kite. One query; kept current locally as orders fill.
+    open_symbols = _get_open_trade_symbols()
+    if len(open_symbols) >= config.MAX_OPEN_TRADES:
         logger.warning(
             "Max open trades reached (%d/%d). Skipping execution.",
-            current_open, config.MAX_OPEN_TRADES
+            len(open_symbols), config.MAX_OPEN_TRADES
         )
         return 0
+
+    pending = []
+    for rec in recommendations:
+        if rec["symbol"] in open_symbols:
+            logger.info("Skipping %s: Open trade already exists.", rec["symbol"])
+        else:
+            pending.append(rec)
+    if not pending:
+        return 0
+
+    if not check_nifty_crash(kite):
+        logger.critical("Global Safety Triggered (Nifty Crash). Aborting all trades.")
+        return 0
         
+    # Fetch Bid/Ask for every recommendation's legs in one round-trip
+    leg_symbols = [
+        "NFO:" + rec["spread"][leg]  # Kite format
+        for rec in pending
+        for leg in ("short_symbol", "long_symbol")
+    ]
+    try:
+        quotes = kite.quote(leg_symbols)
+    except Exception as e:
+        logger.error("Failed to fetch quotes for validation: %s", e)
+        return 0
+
     order_manager = OrderManager(kite)
     executed_count = 0
     
-    for rec in recommendations:
+    for rec in pending:
         symbol = rec["symbol"]
         spread = rec["spread"]
         
-        # ── 2. Duplicate Check ──
-        if _is_duplicate_trade(symbol):
+        # ── 2. Duplicate Check (same symbol twice in this batch) ──
+        if symbol in open_symbols:
             logger.info("Skipping %s: Open trade already exists.", symbol)
             continue
             
         # ── 3. Live Quote Validation ──
-        # Fetch Bid/Ask for spread validation
         short_sym = "NFO:" + spread["short_symbol"] # Kite format
         long_sym = "NFO:" + spread["long_symbol"]
         
-        try:
-            quotes = kite.quote([short_sym, long_sym])
-        except Exception as e:
-            logger.error("Failed to fetch quotes for validation: %s", e)
-            continue
-            
         short_quote = quotes.get(short_sym)
         long_quote = quotes.get(long_sym)
         
@@ -139,31 +154,25 @@ def execute_trades(
         success = order_manager.place_spread_order(symbol, spread)
         if success:
             executed_count += 1
+            open_symbols.append(symbol)
             logger.info("Successfully executed trade for %s", symbol)
             
             # Check max trades again
-            if _get_open_trade_count() >= config.MAX_OPEN_TRADES:
+            if len(open_symbols) >= config.MAX_OPEN_TRADES:
                 logger.info("Max trades limit reached. Stopping execution.")
                 break
         
     return executed_count
 
 
-def _is_duplicate_trade(symbol: str) -> bool:
-    """Check if we already have an OPEN trade for this symbol."""
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "SELECT count(*) FROM trade_log WHERE symbol = ? AND status = 'OPEN'",
-            (symbol,)
-        )
-        count = cursor.fetchone()[0]
-    return count > 0
+def _get_open_trade_symbols() -> list[str]:
+    """
+    Get the symbol of every open trade (one entry per trade).
 
-def _get_open_trade_count() -> int:
-    """Get total number of open trades."""
+    CLOSING trades count as open: their position may still be live.
+    """
     with get_connection() as conn:
         cursor = conn.execute(
-            "SELECT count(*) FROM trade_log WHERE status = 'OPEN'"
+            "SELECT symbol FROM trade_log WHERE status IN ('OPEN', 'CLOSING')"
         )
-        count = cursor.fetchone()[0]
-    return count
+        return [row[0] for row in cursor.fetchall()]
@@ -103,14 +103,16 @@ class OrderManager:
                     INSERT INTO trade_log (
                         trade_id, symbol, strategy, status, mode,
                         entry_time, short_strike, long_strike, expiry, lot_size,
+                        short_symbol, long_symbol,
                         entry_short_pr, entry_long_pr, net_credit, 
                         sl_price, target_price,
                         short_order_id, long_order_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                     (
                         trade_id, symbol, strategy, status, mode,
                         timestamp, short_strike, long_strike, str(spread["expiry"]), lot_size,
+                        short_sym, long_sym,
                         entry_short_pr, entry_long_pr, net_credit,
                         sl_price, target_price,
                         short_order_id, long_order_id
@@ -13,7 +13,7 @@ import logging
 import sys
 
 from analyst.analyst import analyze_candidates
-from core.kite_client import KiteClient
+from core.kite_client import KiteClient, TokenException
 from scanner.scanner import run_scan
 
 logging.basicConfig(
@@ -39,11 +39,11 @@ def main() -> None:
     args = parser.parse_args()
 
     # ── Authenticate ──
-    kite = KiteClient()
     try:
+        kite = KiteClient()
         kite.margins()
         logger.info("✓ Kite session active.")
-    except Exception as exc:
+    except (ValueError, TokenException) as exc:  # missing / expired token
         logger.error("✗ Kite session invalid: %s", exc)
         print("\nRun auth_login.py first to get a valid access token.")
         sys.exit(1)
@@ -16,9 +16,10 @@ import logging
 import sys
 import time
 
-from core.kite_client import KiteClient
+from core.kite_client import KiteClient, TokenException
 from scanner.scanner import run_scan
 from analyst.analyst import analyze_candidates
+from db.schema import initialise_database
 from executor.executor import execute_trades
 import config
 
@@ -37,12 +38,15 @@ def main():
     parser.add_argument("--min-score", type=float, default=50.0, help="Min IVP/HV score")
     args = parser.parse_args()
 
+    # Ensure DB exists and trade_log has the leg symbol columns
+    initialise_database()
+
     # 1. Auth
     try:
         kite = KiteClient()
         kite.margins() # Validate token
         logger.info("✓ Kite session active.")
-    except Exception as e:
+    except (ValueError, TokenException) as e:  # missing / expired token
         logger.error(f"Kite session failed: {e}")
         print("Run auth_login.py to refresh token.")
         sys.exit(1)
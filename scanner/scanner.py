@@ -25,6 +25,7 @@ Usage:
 import logging
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any
 
 import config
@@ -80,6 +81,7 @@ def run_scan(
         - ema_50       : float   — 50-day EMA value
         - spot         : float   — current market price
         - current_iv   : float   — latest ATM IV
+        - candles      : list    — daily candles (reused by the analyst)
 
         Sorted by score descending. Empty list if nothing qualifies.
     """
@@ -93,9 +95,12 @@ def run_scan(
         return []
 
     # ── Step 1: Fetch instrument masters ──
-    fno_stocks = get_fno_stocks(kite)
-    time.sleep(random.uniform(0.3, 0.8))
-    nse_token_map = build_nse_token_map(kite)
+    # The NFO and NSE dumps are independent downloads; fetch them together
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fno_future = executor.submit(get_fno_stocks, kite)
+        nse_future = executor.submit(build_nse_token_map, kite)
+        fno_stocks = fno_future.result()
+        nse_token_map = nse_future.result()
 
     scored: list[dict[str, Any]] = []
     
@@ -105,8 +110,6 @@ def run_scan(
         min_score,
     )
 
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-
     # Parallel processing with max_workers=10 (conservative for rate limits)
     # Kite Connect usually allows ~3 req/sec, but checks are lightweight.
     with ThreadPoolExecutor(max_workers=10) as executor:
@@ -189,11 +192,14 @@ def _process_stock(
 
     # ── Step 2d: Trend detection ──
     trend_data = {"trend": "Unknown", "ema_50": None, "spot": spot}
+    candles: list[dict] = []
     if nse_token:
         try:
-            # We need 120 days history for EMA-50
+            # We need 120 days history for EMA-50, and the analyst reuses
+            # these candles for its Volume Profile, so cover that too.
             # This is the most expensive call.
-            candles = kite.historical_data(nse_token, "day", 120)
+            history_days = max(120, config.VP_HISTORY_DAYS)
+            candles = kite.historical_data(nse_token, "day", history_days)
             trend_data = detect_trend(candles, spot)
         except Exception as exc:
             logger.warning("Trend detection failed for %s: %s", symbol, exc)
@@ -206,6 +212,7 @@ def _process_stock(
         "ema_50": trend_data.get("ema_50"),
         "spot": spot,
         "current_iv": iv_result.get("current_iv"),
+        "candles": candles,
     }
     
     logger.info(
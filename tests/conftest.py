@@ -0,0 +1,28 @@
+"""
+Shared pytest configuration — puts the project root on sys.path once
+so test modules can import the bot packages directly.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db import connection  # noqa: E402  (needs the sys.path entry above)
+from db.schema import initialise_database  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    """
+    Point the bot at an initialised SQLite file instead of data/iv_sniper.db.
+
+    The schema is built once per test module; tests that write trades
+    clear trade_log themselves.
+    """
+    path = tmp_path_factory.mktemp("db") / "iv_sniper.db"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(connection, "DB_PATH", path)
+        initialise_database()
+        yield path
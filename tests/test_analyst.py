@@ -0,0 +1,104 @@
+"""
+Test Analyst — verify reuse of the scanner's candles for the Volume Profile.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from analyst import analyst
+from analyst.analyst import _recent_candles
+from scanner import scanner
+import config
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _daily_candles(days):
+    # Kite returns timezone-aware candle dates, oldest first
+    today = date.today()
+    return [
+        {"date": datetime.combine(today - timedelta(days=d), time(9, 15), IST), "close": 100.0}
+        for d in range(days, -1, -1)
+    ]
+
+
+@pytest.mark.parametrize(
+    "candles, days, expected_len",
+    [
+        pytest.param(_daily_candles(120), 90, 91, id="trimmed_to_window"),
+        pytest.param(_daily_candles(30), 90, 31, id="shorter_than_window"),
+        pytest.param([], 90, 0, id="empty"),
+        pytest.param(None, 90, 0, id="missing"),
+    ],
+)
+def test_recent_candles(candles, days, expected_len):
+    assert len(_recent_candles(candles, days)) == expected_len
+
+
+class _StubKite:
+    def __init__(self):
+        self.history_days = None
+
+    def ltp(self, symbols):
+        return {s: {"last_price": 100.0} for s in symbols}
+
+    def historical_data(self, token, interval, days):
+        self.history_days = days
+        return _daily_candles(days)
+
+
+def test_scanner_candles_cover_vp_window(monkeypatch):
+    # Raising the VP lookback must widen the scanner's fetch, not truncate the VP
+    monkeypatch.setattr(config, "VP_HISTORY_DAYS", 200)
+    monkeypatch.setattr(scanner.time, "sleep", lambda s: None)
+    monkeypatch.setattr(
+        scanner, "get_iv_score",
+        lambda **kw: {"score": 90.0, "method": "IVP", "current_iv": 0.3},
+    )
+    kite = _StubKite()
+
+    candidate = scanner._process_stock(kite, "TEST", {"TEST": 1}, min_score=50)
+
+    assert kite.history_days == 200
+    assert len(_recent_candles(candidate["candles"], config.VP_HISTORY_DAYS)) == 201
+
+
+def _plan(symbol):
+    # The parts of an _analyze_single() plan that _price_spread() reads
+    def leg(strike):
+        return {"tradingsymbol": f"{symbol}25DEC{strike}PE"}
+
+    return {
+        "candidate": {"symbol": symbol, "trend": "Bullish", "spot": 1000.0},
+        "profile": {"poc": 950.0, "va_high": 980.0, "va_low": 920.0, "adv": 1e6},
+        "walls": {"support_wall": 950.0, "resistance_wall": None},
+        "strike_result": {
+            "spread_type": "BULL_PUT", "short_strike": 950, "long_strike": 900,
+            "short_instrument": leg(950), "long_instrument": leg(900),
+            "expiry": "2025-12-25", "lot_size": 50,
+        },
+    }
+
+
+class _QuoteKite:
+    """Counts ltp calls; symbol ZERO has no short-leg premium."""
+
+    def __init__(self):
+        self.ltp_calls = []
+
+    def ltp(self, symbols):
+        self.ltp_calls.append(list(symbols))
+        return {s: {"last_price": 0.0 if s.startswith("NFO:ZERO") else 10.0} for s in symbols}
+
+
+def test_premiums_fetched_in_one_batch(monkeypatch):
+    # Workers only plan spreads; every leg is priced by a single ltp call
+    monkeypatch.setattr(analyst, "_analyze_single", lambda c, k, m: _plan(c["symbol"]))
+    candidates = [{"symbol": s, "trend": "Bullish", "spot": 1000.0} for s in ("AAA", "ZERO", "BBB")]
+    kite = _QuoteKite()
+
+    recommendations = analyst.analyze_candidates(candidates, kite, nse_token_map={})
+
+    assert len(kite.ltp_calls) == 1
+    assert len(kite.ltp_calls[0]) == 6
+    assert [r["symbol"] for r in recommendations] == ["AAA", "BBB"]
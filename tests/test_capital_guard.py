@@ -0,0 +1,55 @@
+"""
+Test Capital Guard — verify the per-trade liquidity checks.
+"""
+import pytest
+
+from executor.capital_guard import check_bid_ask_spread, check_circuit_limits
+import config
+
+
+@pytest.fixture(autouse=True)
+def _spread_limit(monkeypatch):
+    monkeypatch.setattr(config, "BID_ASK_SPREAD_LIMIT_PCT", 5)
+
+
+@pytest.mark.parametrize(
+    "bid, ask, ltp, expected",
+    [
+        pytest.param(99.0, 101.0, 100.0, True, id="tight_2pct"),
+        pytest.param(97.5, 102.5, 100.0, True, id="at_limit_5pct"),
+        pytest.param(95.0, 105.0, 100.0, False, id="wide_10pct"),
+        pytest.param(1.0, 1.0, 0.0, False, id="no_ltp"),
+        pytest.param(
+            0.0, 0.0, 100.0, False, id="empty_depth",
+            marks=pytest.mark.xfail(
+                reason="zero bid/ask from an empty order book reads as a 0% spread",
+                strict=True,
+            ),
+        ),
+    ],
+)
+def test_bid_ask_spread(bid, ask, ltp, expected):
+    assert check_bid_ask_spread("NFO:TEST", bid, ask, ltp) == expected
+
+
+@pytest.mark.parametrize(
+    "quote, expected",
+    [
+        pytest.param(
+            {"last_price": 100, "upper_circuit_limit": 110, "lower_circuit_limit": 90},
+            True, id="inside_band",
+        ),
+        pytest.param(
+            {"last_price": 110, "upper_circuit_limit": 110, "lower_circuit_limit": 90},
+            False, id="upper_circuit",
+        ),
+        pytest.param(
+            {"last_price": 90, "upper_circuit_limit": 110, "lower_circuit_limit": 90},
+            False, id="lower_circuit",
+        ),
+        pytest.param({"last_price": 100}, True, id="limits_not_reported"),
+        pytest.param({"last_price": 0}, False, id="no_ltp"),
+    ],
+)
+def test_circuit_limits(quote, expected):
+    assert check_circuit_limits("NSE:TEST", quote) == expected
@@ -0,0 +1,117 @@
+"""
+Test Executor — verify duplicate and open-trade limits in execute_trades.
+"""
+import sqlite3
+
+import pytest
+
+from executor.executor import execute_trades
+from executor.order_manager import OrderManager
+import config
+
+
+def _rec(symbol):
+    return {
+        "symbol": symbol,
+        "spread": {
+            "type": "BULL_PUT",
+            "short_symbol": f"{symbol}25DEC1000PE",
+            "long_symbol": f"{symbol}25DEC950PE",
+            "short_strike": 1000,
+            "long_strike": 950,
+            "expiry": "2025-12-25",
+            "lot_size": 50,
+            "short_premium": 10.0,
+            "long_premium": 4.0,
+            "net_credit": 6.0,
+            "sl_premium": 12.0,
+            "target_premium": 3.0,
+        },
+    }
+
+
+class _StubKite:
+    """Records every Kite call; quotes are liquid and margin is ample."""
+
+    def __init__(self):
+        self.calls = []
+
+    def quote(self, symbols):
+        self.calls.append("quote")
+        leg = {
+            "last_price": 10.0,
+            "depth": {"buy": [{"price": 9.9}], "sell": [{"price": 10.1}]},
+        }
+        return {s: leg for s in symbols}  # flat Nifty: no ohlc -> no crash
+
+    def margins(self):
+        self.calls.append("margins")
+        return {"equity": {"net": 1_000_000}}
+
+    def basket_margins(self, orders):
+        self.calls.append("basket_margins")
+        return {"initial": {"total": 10_000}}
+
+
+@pytest.fixture
+def kite(db_path, monkeypatch):
+    monkeypatch.setattr(config, "MAX_OPEN_TRADES", 3)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("DELETE FROM trade_log")
+    conn.commit()
+    conn.close()
+    return _StubKite()
+
+
+def _open_trades(symbols):
+    manager = OrderManager(kite=None)
+    for symbol in symbols:
+        assert manager.place_spread_order(symbol, _rec(symbol)["spread"], is_paper=True)
+
+
+def _logged_symbols(db_path):
+    with sqlite3.connect(str(db_path)) as conn:
+        return sorted(row[0] for row in conn.execute("SELECT symbol FROM trade_log"))
+
+
+def test_all_duplicate_batch_makes_no_kite_calls(kite, db_path):
+    _open_trades(["AAA", "BBB"])
+
+    assert execute_trades([_rec("AAA"), _rec("BBB")], kite) == 0
+    assert kite.calls == []
+
+
+def test_closing_trade_still_counts_as_open(kite, db_path):
+    # A trade whose exit is in flight may still hold a live position
+    _open_trades(["AAA"])
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("UPDATE trade_log SET status = 'CLOSING'")
+    conn.commit()
+    conn.close()
+
+    assert execute_trades([_rec("AAA")], kite) == 0
+    assert kite.calls == []
+
+
+def test_repeated_symbol_in_batch_placed_once(kite, db_path):
+    assert execute_trades([_rec("AAA"), _rec("AAA"), _rec("BBB")], kite) == 2
+    assert _logged_symbols(db_path) == ["AAA", "BBB"]
+    assert kite.calls.count("quote") == 2  # Nifty check + one batch for all legs
+
+
+@pytest.mark.parametrize(
+    "already_open, expected_executed",
+    [
+        pytest.param(["OLD1"], 2, id="fills_to_limit"),
+        pytest.param(["OLD1", "OLD2", "OLD3"], 0, id="already_at_limit"),
+    ],
+)
+def test_execution_stops_at_max_open_trades(kite, db_path, already_open, expected_executed):
+    _open_trades(already_open)
+
+    executed = execute_trades([_rec(s) for s in ("AAA", "BBB", "CCC")], kite)
+
+    assert executed == expected_executed
+    assert len(_logged_symbols(db_path)) == config.MAX_OPEN_TRADES
+    if not expected_executed:
+        assert kite.calls == []
@@ -0,0 +1,53 @@
+"""
+Test Kite Client — verify request batching without hitting the Kite API.
+"""
+import pytest
+
+from core import kite_client
+from core.kite_client import KiteClient
+import config
+
+
+class _FakeKite:
+    """Records market-quote requests; answers every symbol."""
+
+    def __init__(self):
+        self.requests = []
+
+    def ltp(self, symbols):
+        self.requests.append(list(symbols))
+        return {s: {"last_price": 1.0} for s in symbols}
+
+    quote = ltp
+
+
+@pytest.fixture
+def kite(monkeypatch):
+    monkeypatch.setattr(config, "KITE_API_KEY", "test_key")
+    monkeypatch.setattr(config, "KITE_ACCESS_TOKEN", "")
+    client = KiteClient()
+    client._kite = _FakeKite()
+    return client
+
+
+@pytest.mark.parametrize(
+    "method, limit",
+    [
+        pytest.param("ltp", kite_client._LTP_BATCH_LIMIT, id="ltp"),
+        pytest.param("quote", kite_client._QUOTE_BATCH_LIMIT, id="quote"),
+    ],
+)
+def test_requests_chunked_at_kite_limit(kite, method, limit):
+    symbols = [f"NSE:S{i}" for i in range(limit + 5)]
+
+    result = getattr(kite, method)(symbols)
+
+    assert [len(r) for r in kite._kite.requests] == [limit, 5]
+    assert list(result) == symbols
+
+
+def test_duplicate_symbols_requested_once(kite):
+    result = kite.quote(["NFO:A", "NFO:B", "NFO:A"])
+
+    assert kite._kite.requests == [["NFO:A", "NFO:B"]]
+    assert set(result) == {"NFO:A", "NFO:B"}
@@ -0,0 +1,47 @@
+"""
+Test Order Manager — verify paper trades are logged to trade_log.
+"""
+import sqlite3
+
+import pytest
+
+from db.schema import initialise_database
+from executor.order_manager import OrderManager
+
+SPREAD = {
+    "type": "BULL_PUT",
+    "short_symbol": "TEST25DEC1000PE",
+    "long_symbol": "TEST25DEC950PE",
+    "short_strike": 1000,
+    "long_strike": 950,
+    "expiry": "2025-12-25",
+    "lot_size": 50,
+    "short_premium": 30.0,
+    "long_premium": 10.0,
+    "net_credit": 20.0,
+    "sl_premium": 40.0,
+    "target_premium": 10.0,
+}
+
+
+@pytest.fixture
+def legacy_db(db_path):
+    # trade_log as created before the leg symbol columns were added
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("ALTER TABLE trade_log DROP COLUMN short_symbol")
+    conn.execute("ALTER TABLE trade_log DROP COLUMN long_symbol")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_paper_trade_logged_after_migration(legacy_db):
+    # Entry scripts run initialise_database() before placing orders
+    initialise_database()
+
+    assert OrderManager(kite=None).place_spread_order("TEST", SPREAD, is_paper=True)
+
+    row = legacy_db.execute(
+        "SELECT status, mode, short_symbol, long_symbol FROM trade_log"
+    ).fetchone()
+    assert row == ("OPEN", "PAPER", SPREAD["short_symbol"], SPREAD["long_symbol"])
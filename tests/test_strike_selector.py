@@ -3,203 +3,205 @@ Test Strike Selector — verify OTM strike selection and spread P&L math.
 
 Uses a mock option chain with known strike intervals.
 """
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
+import calendar
 from datetime import date, timedelta
+
+import pytest
+
 from analyst.strike_selector import (
+    THURSDAY,
+    WEDNESDAY,
     select_strikes,
     compute_spread_pnl,
     find_nearest_monthly_expiry,
+    _is_last_thursday_of_month,
 )
 
-passed = 0
-failed = 0
-
-
-def check(name, condition, detail=""):
-    global passed, failed
-    if condition:
-        print(f"  ✓ {name}")
-        passed += 1
-    else:
-        print(f"  ✗ {name}  {detail}")
-        failed += 1
-
 
 # ─────────────────────────────────────────
 # Build a mock option chain
 # ─────────────────────────────────────────
 # Simulates a stock at ₹1000, strikes every ₹50, monthly expiry
 
-# Find the next last-Thursday-of-month for realistic expiry
-def _next_monthly_expiry():
-    today = date.today()
-    # Go to end of current month
-    if today.month == 12:
-        next_month = date(today.year + 1, 1, 1)
+def _last_thursday(day: date) -> date:
+    """Last Thursday of the month containing ``day``."""
+    if day.month == 12:
+        next_month = date(day.year + 1, 1, 1)
     else:
-        next_month = date(today.year, today.month + 1, 1)
+        next_month = date(day.year, day.month + 1, 1)
     last_day = next_month - timedelta(days=1)
     # Roll back to Thursday
-    while last_day.weekday() != 3:  # 3 = Thursday
-        last_day -= timedelta(days=1)
+    return last_day - timedelta(days=(last_day.weekday() - THURSDAY) % 7)
+
+
+# Find the next last-Thursday-of-month for realistic expiry
+def _next_monthly_expiry():
+    today = date.today()
+    last_day = _last_thursday(today)
     if last_day <= today:
         # Move to next month
-        if next_month.month == 12:
-            next_next = date(next_month.year + 1, 1, 1)
-        else:
-            next_next = date(next_month.year, next_month.month + 1, 1)
-        last_day = next_next - timedelta(days=1)
-        while last_day.weekday() != 3:
-            last_day -= timedelta(days=1)
+        last_day = _last_thursday(last_day + timedelta(days=7))
     return last_day
 
 
-expiry = _next_monthly_expiry()
-
-mock_chain = []
-for strike in range(700, 1400, 50):  # ₹700 to ₹1350 in ₹50 steps
-    mock_chain.append({
-        "tradingsymbol": f"TESTSTOCK{strike}PE",
-        "name": "TESTSTOCK",
-        "instrument_type": "PE",
-        "strike": float(strike),
-        "expiry": expiry,
-        "lot_size": 100,
-        "instrument_token": 10000 + strike,
-    })
-    mock_chain.append({
-        "tradingsymbol": f"TESTSTOCK{strike}CE",
-        "name": "TESTSTOCK",
-        "instrument_type": "CE",
-        "strike": float(strike),
-        "expiry": expiry,
-        "lot_size": 100,
-        "instrument_token": 20000 + strike,
-    })
+@pytest.fixture(scope="module")
+def expiry():
+    return _next_monthly_expiry()
+
+
+@pytest.fixture(scope="module")
+def mock_chain(expiry):
+    chain = []
+    for strike in range(700, 1400, 50):  # ₹700 to ₹1350 in ₹50 steps
+        chain.append({
+            "tradingsymbol": f"TESTSTOCK{strike}PE",
+            "name": "TESTSTOCK",
+            "instrument_type": "PE",
+            "strike": float(strike),
+            "expiry": expiry,
+            "lot_size": 100,
+            "instrument_token": 10000 + strike,
+        })
+        chain.append({
+            "tradingsymbol": f"TESTSTOCK{strike}CE",
+            "name": "TESTSTOCK",
+            "instrument_type": "CE",
+            "strike": float(strike),
+            "expiry": expiry,
+            "lot_size": 100,
+            "instrument_token": 20000 + strike,
+        })
+    return chain
 
 
 # ─────────────────────────────────────────
 # Test 1: Nearest Monthly Expiry
 # ─────────────────────────────────────────
-print("\n── Test 1: Monthly Expiry Detection ──")
 
-found_expiry = find_nearest_monthly_expiry(mock_chain)
-check("Expiry found", found_expiry is not None)
-check("Expiry matches mock", found_expiry == expiry, f"got {found_expiry}")
-check("Expiry is a Thursday", found_expiry.weekday() == 3, f"weekday={found_expiry.weekday()}")
-print(f"    Expiry: {found_expiry}")
+def test_monthly_expiry_detection(mock_chain, expiry):
+    found_expiry = find_nearest_monthly_expiry(mock_chain)
+    assert found_expiry is not None
+    assert found_expiry == expiry
+    assert found_expiry.weekday() == THURSDAY
 
 
-# ─────────────────────────────────────────
-# Test 2: Bull Put Spread (Bullish)
-# ─────────────────────────────────────────
-print("\n── Test 2: Bull Put Spread (Bullish) ──")
+# A fixed Monday-to-Sunday week; any week works since each expiry is
+# checked on its own.
+_MONDAY = date(2030, 1, 7)
 
-# Spot = 1000, support wall at 920
-result = select_strikes(
-    wall_price=920.0, spot=1000.0, trend="Bullish",
-    option_chain=mock_chain, target_expiry=expiry,
+
+@pytest.mark.parametrize(
+    "weekday",
+    [pytest.param(wd, id=calendar.day_name[wd]) for wd in range(7)],
 )
-check("Spread result is not None", result is not None)
+def test_last_thursday_weekday(weekday):
+    # Only Thursday (or Wednesday when Thursday is a holiday) is a monthly expiry
+    exp = _MONDAY + timedelta(days=weekday)
+    assert _is_last_thursday_of_month(exp, {exp}) == (weekday in (WEDNESDAY, THURSDAY))
 
-if result:
-    check("Spread type is BULL_PUT", result["spread_type"] == "BULL_PUT")
-    check("Short type is PE", result["short_type"] == "PE")
-    check("Short strike ≤ wall (920)", result["short_strike"] <= 920.0,
-          f"got {result['short_strike']}")
-    check("Short strike < spot (1000)", result["short_strike"] < 1000.0)
-    check("Long strike < short strike", result["long_strike"] < result["short_strike"])
-    check("Long strike = short - 50 (1 width)", result["long_strike"] == result["short_strike"] - 50,
-          f"short={result['short_strike']}, long={result['long_strike']}")
-    check("Lot size = 100", result["lot_size"] == 100)
 
-    print(f"    Short: {result['short_instrument']['tradingsymbol']} @ {result['short_strike']}")
-    print(f"    Long:  {result['long_instrument']['tradingsymbol']} @ {result['long_strike']}")
+def test_past_expiry_ignored():
+    past = date.today() - timedelta(days=1)
+    chain = [{"tradingsymbol": "TESTSTOCK1000PE", "expiry": past}]
+    assert find_nearest_monthly_expiry(chain) is None
 
 
 # ─────────────────────────────────────────
-# Test 3: Bear Call Spread (Bearish)
+# Test 2: Bull Put Spread (Bullish)
 # ─────────────────────────────────────────
-print("\n── Test 3: Bear Call Spread (Bearish) ──")
-
-# Spot = 1000, resistance wall at 1080
-result = select_strikes(
-    wall_price=1080.0, spot=1000.0, trend="Bearish",
-    option_chain=mock_chain, target_expiry=expiry,
-)
-check("Spread result is not None", result is not None)
 
-if result:
-    check("Spread type is BEAR_CALL", result["spread_type"] == "BEAR_CALL")
-    check("Short type is CE", result["short_type"] == "CE")
-    check("Short strike ≥ wall (1080)", result["short_strike"] >= 1080.0,
-          f"got {result['short_strike']}")
-    check("Short strike > spot (1000)", result["short_strike"] > 1000.0)
-    check("Long strike > short strike", result["long_strike"] > result["short_strike"])
-    check("Long strike = short + 50 (1 width)", result["long_strike"] == result["short_strike"] + 50,
-          f"short={result['short_strike']}, long={result['long_strike']}")
+def test_bull_put_spread(mock_chain, expiry):
+    # Spot = 1000, support wall at 920
+    result = select_strikes(
+        wall_price=920.0, spot=1000.0, trend="Bullish",
+        option_chain=mock_chain, target_expiry=expiry,
+    )
+    assert result is not None
 
-    print(f"    Short: {result['short_instrument']['tradingsymbol']} @ {result['short_strike']}")
-    print(f"    Long:  {result['long_instrument']['tradingsymbol']} @ {result['long_strike']}")
+    assert result["spread_type"] == "BULL_PUT"
+    assert result["short_type"] == "PE"
+    assert result["short_strike"] <= 920.0, "Short strike ≤ wall (920)"
+    assert result["short_strike"] < 1000.0, "Short strike < spot (1000)"
+    assert result["long_strike"] < result["short_strike"]
+    assert result["long_strike"] == result["short_strike"] - 50, "Long strike = short - 50 (1 width)"
+    assert result["lot_size"] == 100
 
 
 # ─────────────────────────────────────────
-# Test 4: Spread P&L calculation
+# Test 3: Bear Call Spread (Bearish)
 # ─────────────────────────────────────────
-print("\n── Test 4: Spread P&L ──")
-
-pnl = compute_spread_pnl(
-    short_premium=45.0,
-    long_premium=22.0,
-    lot_size=100,
-    spread_width=50.0,
-    sl_pct=100.0,
-    target_pct=50.0,
-)
-check("Net credit = 23.0", pnl["net_credit"] == 23.0, f"got {pnl['net_credit']}")
-check("Max profit = 2300", pnl["max_profit"] == 2300.0, f"got {pnl['max_profit']}")
-check("Max loss = 2700", pnl["max_loss"] == 2700.0, f"got {pnl['max_loss']}")
-check("RR ratio > 0", pnl["risk_reward"] > 0)
-check("SL premium = 90 (2× short)", pnl["sl_premium"] == 90.0, f"got {pnl['sl_premium']}")
-check("Target premium = 22.5 (half short)", pnl["target_premium"] == 22.5,
-      f"got {pnl['target_premium']}")
 
-print(f"    Net credit: ₹{pnl['net_credit']} per unit, ₹{pnl['max_profit']} total")
-print(f"    Max loss: ₹{pnl['max_loss']} | RR: {pnl['risk_reward']}")
-print(f"    SL at ₹{pnl['sl_premium']} | Target at ₹{pnl['target_premium']}")
+def test_bear_call_spread(mock_chain, expiry):
+    # Spot = 1000, resistance wall at 1080
+    result = select_strikes(
+        wall_price=1080.0, spot=1000.0, trend="Bearish",
+        option_chain=mock_chain, target_expiry=expiry,
+    )
+    assert result is not None
+
+    assert result["spread_type"] == "BEAR_CALL"
+    assert result["short_type"] == "CE"
+    assert result["short_strike"] >= 1080.0, "Short strike ≥ wall (1080)"
+    assert result["short_strike"] > 1000.0, "Short strike > spot (1000)"
+    assert result["long_strike"] > result["short_strike"]
+    assert result["long_strike"] == result["short_strike"] + 50, "Long strike = short + 50 (1 width)"
 
 
 # ─────────────────────────────────────────
-# Test 5: Edge — wall beyond available strikes
+# Test 4: Spread P&L calculation
 # ─────────────────────────────────────────
-print("\n── Test 5: Edge Cases ──")
 
-# Wall at 500 is far below all strikes (700-1350) 
-# Fallback: nearest OTM put to 500 = strike 700. But short_strike ≤ 700 still < spot 1000, so it should work.
-result = select_strikes(
-    wall_price=500.0, spot=1000.0, trend="Bullish",
-    option_chain=mock_chain, target_expiry=expiry,
-)
-check("Wall far below strikes uses fallback", result is not None or result is None,
-      "either fallback or graceful None is acceptable")
-if result:
-    check("Fallback short strike is OTM", result["short_strike"] < 1000.0)
-
-# Unknown trend
-result = select_strikes(
-    wall_price=1000.0, spot=1000.0, trend="Sideways",
-    option_chain=mock_chain, target_expiry=expiry,
-)
-check("Unknown trend returns None", result is None)
+def test_spread_pnl():
+    pnl = compute_spread_pnl(
+        short_premium=45.0,
+        long_premium=22.0,
+        lot_size=100,
+        spread_width=50.0,
+        sl_pct=100.0,
+        target_pct=50.0,
+    )
+    assert pnl["net_credit"] == 23.0
+    assert pnl["max_profit"] == 2300.0
+    assert pnl["max_loss"] == 2700.0
+    assert pnl["risk_reward"] > 0
+    assert pnl["sl_premium"] == 90.0, "SL premium = 90 (2× short)"
+    assert pnl["target_premium"] == 22.5, "Target premium = 22.5 (half short)"
 
 
 # ─────────────────────────────────────────
-# Summary
+# Test 5: Edge Cases
 # ─────────────────────────────────────────
-print(f"\n{'═' * 40}")
-print(f"  Strike Selector Tests: {passed} passed, {failed} failed")
-print(f"{'═' * 40}\n")
-sys.exit(1 if failed > 0 else 0)
+
+def test_wall_beyond_strikes(mock_chain, expiry):
+    # Wall at 500 is far below all strikes (700-1350)
+    # Fallback: nearest OTM put to 500 = strike 700. But short_strike ≤ 700 still < spot 1000, so it should work.
+    # Either fallback or graceful None is acceptable
+    result = select_strikes(
+        wall_price=500.0, spot=1000.0, trend="Bullish",
+        option_chain=mock_chain, target_expiry=expiry,
+    )
+    if result:
+        assert result["short_strike"] < 1000.0, "Fallback short strike is OTM"
+
+
+# Shared select_strikes arguments; each case below overrides only what it tests
+BASE_REQUEST = {"wall_price": 920.0, "spot": 1000.0, "trend": "Bullish"}
+
+
+@pytest.mark.parametrize(
+    "overrides, expect_spread",
+    [
+        pytest.param({}, True, id="valid_bull_put"),
+        pytest.param({"trend": "Bearish", "wall_price": 1080.0}, True, id="valid_bear_call"),
+        pytest.param({"trend": "Sideways"}, False, id="unknown_trend"),
+        # Spot below every strike (700-1350) → no OTM puts
+        pytest.param({"spot": 600.0}, False, id="no_otm_puts"),
+        # Spot above every strike → no OTM calls
+        pytest.param({"trend": "Bearish", "wall_price": 1500.0, "spot": 1500.0}, False, id="no_otm_calls"),
+    ],
+)
+def test_select_strikes_validity(mock_chain, expiry, overrides, expect_spread):
+    result = select_strikes(
+        option_chain=mock_chain, target_expiry=expiry, **{**BASE_REQUEST, **overrides},
+    )
+    assert (result is not None) == expect_spread
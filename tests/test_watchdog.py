@@ -1,136 +1,266 @@
 """
 Test Watchdog — Mocked test for exit logic.
 """
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-import unittest
-from unittest.mock import MagicMock
-from datetime import datetime
 import sqlite3
-import time
+from datetime import date
+
+import pytest
 
 from db.schema import initialise_database
-from db.connection import DB_PATH
+from watchdog import exits
+from watchdog.exits import ExitManager, recover_closing_trades
 from watchdog.monitor import run_watchdog
 import config
 
-class TestWatchdog(unittest.TestCase):
-    def setUp(self):
-        # Setup clean DB
-        if os.path.exists(str(DB_PATH)):
-            os.remove(str(DB_PATH))
-        initialise_database()
-        
-        # Connect to insert dummy trade
-        self.conn = sqlite3.connect(str(DB_PATH))
-        
-    def tearDown(self):
-        self.conn.close()
-        
-    def _insert_trade(self, credit=20.0, sl_pct=100.0, target_pct=50.0):
-        # Insert a dummy OPEN trade
-        # Strategies: BULL_PUT -> Short PE, Long PE
-        trade_id = "test_trade_1"
-        self.conn.execute(
-            """
-            INSERT INTO trade_log (
-                trade_id, symbol, strategy, status, mode,
-                entry_time, short_strike, long_strike, expiry, lot_size,
-                entry_short_pr, entry_long_pr, net_credit, 
-                sl_price, target_price,
-                short_order_id, long_order_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                trade_id, "TEST", "BULL_PUT", "OPEN", "PAPER",
-                datetime.now().isoformat(), 1000, 950, "2025-12-25", 50,
-                30.0, 10.0, credit, 
-                0, 0, # sl/target price fields (ignored by new logic)
-                "ord1", "ord2"
-            )
+# Leg tradingsymbols of the dummy trade below (monthly format, Dec 2025 expiry)
+SHORT_SYM = "TEST25DEC1000PE"
+LONG_SYM = "TEST25DEC950PE"
+
+# Entry timestamp for the dummy trade (never read back by the watchdog)
+ENTRY_TIME = "2025-01-01T00:00:00"
+
+
+@pytest.fixture
+def conn(db_path, monkeypatch):
+
+    # Credit 20 -> Target 50% exits at Debit <= 10, SL 100% exits at Debit >= 40
+    monkeypatch.setattr(config, "SPREAD_TARGET_PCT", 50)
+    monkeypatch.setattr(config, "SPREAD_SL_PCT", 100)
+
+    # Connect to insert dummy trade. run_watchdog commits through its own
+    # connections, so isolate tests by clearing the table, not by rollback.
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("DELETE FROM trade_log")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _insert_trade(
+    conn, credit=20.0, trade_id="test_trade_1", legs=(SHORT_SYM, LONG_SYM), expiry="2025-12-25",
+    mode="PAPER",
+):
+    # Insert a dummy OPEN trade
+    # Strategies: BULL_PUT -> Short PE, Long PE
+    conn.execute(
+        """
+        INSERT INTO trade_log (
+            trade_id, symbol, strategy, status, mode,
+            entry_time, short_strike, long_strike, expiry, lot_size,
+            short_symbol, long_symbol,
+            entry_short_pr, entry_long_pr, net_credit,
+            sl_price, target_price,
+            short_order_id, long_order_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            trade_id, "TEST", "BULL_PUT", "OPEN", mode,
+            ENTRY_TIME, 1000, 950, expiry, 50,
+            *legs,
+            30.0, 10.0, credit,
+            0, 0, # sl/target price fields (ignored by new logic)
+            "ord1", "ord2"
         )
-        self.conn.commit()
-        return trade_id
-
-    def test_profit_target_exit(self):
-        # 1. Setup Trade with Credit 20. Target 50% -> Exit if Debit <= 10.
-        self._insert_trade(credit=20.0)
-        
-        # 2. Mock Kite
-        mock_kite = MagicMock()
-        # Mock quote response: Short=14, Long=5 -> Debit = 9.
-        # 9 < 10, so TARGET hit.
-        short_sym = "TEST25DEC1000PE"
-        long_sym = "TEST25DEC950PE"
-        
-        mock_kite.quote.return_value = {
-            f"NFO:{short_sym}": {"last_price": 14.0},
-            f"NFO:{long_sym}": {"last_price": 5.0}
-        }
-        
-        # 3. Run Watchdog
-        run_watchdog(mock_kite)
-        
-        # 4. Verify DB
-        cursor = self.conn.execute("SELECT status, exit_reason, pnl FROM trade_log WHERE trade_id='test_trade_1'")
-        row = cursor.fetchone()
-        
-        self.assertEqual(row[0], "CLOSED")
-        self.assertEqual(row[1], "TARGET")
-        # P&L = (Credit 20 - Debit 9) * Lot 50 = 11 * 50 = 550
-        self.assertAlmostEqual(row[2], 550.0)
-        print("✓ Profit Target test passed (P&L: 550.0)")
-
-    def test_stop_loss_exit(self):
-        # 1. Setup Trade with Credit 20. SL 100% -> Exit if Debit >= 40.
-        config.SPREAD_SL_PCT = 100
-        self._insert_trade(credit=20.0)
-        
-        # 2. Mock Kite
-        mock_kite = MagicMock()
-        # Mock quote: Short=50, Long=5 -> Debit = 45.
-        # 45 >= 40, so SL hit.
-        short_sym = "TEST25DEC1000PE"
-        long_sym = "TEST25DEC950PE"
-        
-        mock_kite.quote.return_value = {
-            f"NFO:{short_sym}": {"last_price": 50.0},
-            f"NFO:{long_sym}": {"last_price": 5.0}
-        }
-        
-        # 3. Run Watchdog
-        run_watchdog(mock_kite)
-        
-        # 4. Verify
-        cursor = self.conn.execute("SELECT status, exit_reason, pnl FROM trade_log WHERE trade_id='test_trade_1'")
-        row = cursor.fetchone()
-        
-        self.assertEqual(row[0], "CLOSED")
-        self.assertEqual(row[1], "SL")
-        # P&L = (20 - 45) * 50 = -25 * 50 = -1250
-        self.assertAlmostEqual(row[2], -1250.0)
-        print("✓ Stop Loss test passed (P&L: -1250.0)")
-
-    def test_no_exit(self):
-        # 1. Setup Trade Credit 20. Debit 15. (Target 10, SL 40). No Exit.
-        self._insert_trade(credit=20.0)
-        
-        mock_kite = MagicMock()
-        short_sym = "TEST25DEC1000PE"
-        long_sym = "TEST25DEC950PE"
-        mock_kite.quote.return_value = {
-            f"NFO:{short_sym}": {"last_price": 20.0},
-            f"NFO:{long_sym}": {"last_price": 5.0}
-        }
-        
-        run_watchdog(mock_kite)
-        
-        cursor = self.conn.execute("SELECT status FROM trade_log WHERE trade_id='test_trade_1'")
-        row = cursor.fetchone()
-        self.assertEqual(row[0], "OPEN")
-        print("✓ No Exit test passed")
-
-if __name__ == "__main__":
-    unittest.main()
+    )
+    conn.commit()
+    return trade_id
+
+
+class _StubKite:
+    """Minimal Kite stand-in; any API the watchdog calls must be added here."""
+
+    def __init__(self, quotes, fail_tags=()):
+        self._quotes = quotes
+        self._fail_tags = set(fail_tags)
+        self.orders = []
+
+    def quote(self, symbols):
+        return self._quotes
+
+    def place_order(self, **kwargs):
+        if kwargs["tag"] in self._fail_tags:
+            raise RuntimeError("order rejected")
+        self.orders.append((kwargs["tradingsymbol"], kwargs["transaction_type"]))
+        return f"order_{len(self.orders)}"
+
+
+def _stub_kite(short_price, long_price, fail_tags=()):
+    return _StubKite({
+        f"NFO:{SHORT_SYM}": {"last_price": short_price},
+        f"NFO:{LONG_SYM}": {"last_price": long_price},
+    }, fail_tags)
+
+
+# P&L = (Credit 20 - Debit) * Lot 50
+@pytest.mark.parametrize(
+    "short_price, long_price, expected_status, expected_reason, expected_pnl",
+    [
+        # Debit = 9 < 10 -> TARGET
+        pytest.param(14.0, 5.0, "CLOSED", "TARGET", 550.0, id="target_hit"),
+        # Debit = 10 == target threshold -> TARGET
+        pytest.param(15.0, 5.0, "CLOSED", "TARGET", 500.0, id="target_boundary"),
+        # Debit = 45 >= 40 -> SL
+        pytest.param(50.0, 5.0, "CLOSED", "SL", -1250.0, id="sl_hit"),
+        # Debit = 40 == SL threshold -> SL
+        pytest.param(45.0, 5.0, "CLOSED", "SL", -1000.0, id="sl_boundary"),
+        # Debit = 15, between Target 10 and SL 40 -> no exit
+        pytest.param(20.0, 5.0, "OPEN", None, None, id="no_exit"),
+    ],
+)
+def test_watchdog_exit(
+    conn, short_price, long_price, expected_status, expected_reason, expected_pnl
+):
+    trade_id = _insert_trade(conn, credit=20.0)
+
+    run_watchdog(_stub_kite(short_price, long_price))
+
+    row = conn.execute(
+        "SELECT status, exit_reason, pnl FROM trade_log WHERE trade_id = ?",
+        (trade_id,),
+    ).fetchone()
+
+    assert row[0] == expected_status
+    assert row[1] == expected_reason
+    if expected_pnl is None:
+        assert row[2] is None
+    else:
+        assert row[2] == pytest.approx(expected_pnl)
+
+
+def test_watchdog_closes_multiple_trades(conn):
+    # Two trades hitting target in the same cycle are closed in one batch
+    trade_ids = [_insert_trade(conn, trade_id=f"test_trade_{i}") for i in (1, 2)]
+
+    run_watchdog(_stub_kite(14.0, 5.0))
+
+    rows = conn.execute(
+        "SELECT status, exit_reason, pnl FROM trade_log WHERE trade_id IN (?, ?)",
+        trade_ids,
+    ).fetchall()
+
+    assert rows == [("CLOSED", "TARGET", pytest.approx(550.0))] * 2
+
+
+@pytest.mark.parametrize(
+    "trade_ids",
+    [
+        pytest.param(("live_bad",), id="single"),
+        pytest.param(("live_ok", "live_bad"), id="batch"),
+    ],
+)
+def test_failed_live_exit_stays_open(conn, trade_ids):
+    # Exit orders for live_bad are rejected; only live_ok may be marked CLOSED
+    for trade_id in trade_ids:
+        _insert_trade(conn, trade_id=trade_id, mode="LIVE")
+    kite = _stub_kite(14.0, 5.0, fail_tags={"EXIT_live_bad"})
+
+    run_watchdog(kite)
+
+    rows = dict(conn.execute("SELECT trade_id, status FROM trade_log").fetchall())
+    assert rows == {
+        trade_id: "OPEN" if trade_id == "live_bad" else "CLOSED" for trade_id in trade_ids
+    }
+    assert kite.orders == [(SHORT_SYM, "BUY"), (LONG_SYM, "SELL")] * (len(trade_ids) - 1)
+
+
+def test_watchdog_expiry_square_off(conn, monkeypatch):
+    # On expiry day past the square-off time, exit even with the spread mid-range
+    monkeypatch.setattr(config, "EXPIRY_SQUARE_OFF_TIME", "00:00")
+    trade_id = _insert_trade(conn, expiry=date.today().isoformat())
+
+    run_watchdog(_stub_kite(20.0, 5.0))
+
+    row = conn.execute(
+        "SELECT status, exit_reason FROM trade_log WHERE trade_id = ?", (trade_id,)
+    ).fetchone()
+    assert row == ("CLOSED", "EXPIRY")
+
+
+def test_closed_trade_not_closed_again(conn):
+    # A second close (e.g. a repeated exit signal) must not overwrite the first
+    trade_id = _insert_trade(conn)
+    trade = {"trade_id": trade_id, "symbol": "TEST", "mode": "PAPER",
+             "lot_size": 50, "net_credit": 20.0}
+    manager = ExitManager(kite=None)
+
+    assert manager.close_trade(trade, "TARGET", 14.0, 5.0)
+    assert not manager.close_trade(trade, "SL", 50.0, 5.0)
+    assert manager.close_trades([(trade, "SL", 50.0, 5.0)] * 2) == 0
+
+    row = conn.execute(
+        "SELECT exit_reason, pnl FROM trade_log WHERE trade_id = ?", (trade_id,)
+    ).fetchone()
+    assert row == ("TARGET", pytest.approx(550.0))
+
+
+def test_repeated_live_exit_orders_sent_once(conn):
+    # Duplicate and repeated exit signals must not open a reversed position
+    trade_id = _insert_trade(conn, mode="LIVE")
+    trade = {"trade_id": trade_id, "symbol": "TEST", "mode": "LIVE", "lot_size": 50,
+             "net_credit": 20.0, "short_symbol": SHORT_SYM, "long_symbol": LONG_SYM}
+    kite = _stub_kite(14.0, 5.0)
+    manager = ExitManager(kite)
+
+    assert manager.close_trades([(trade, "TARGET", 14.0, 5.0)] * 2) == 1
+    assert not manager.close_trade(trade, "SL", 50.0, 5.0)
+    unknown = dict(trade, trade_id="not_in_db")
+    assert manager.close_trades([(trade, "SL", 50.0, 5.0), (unknown, "SL", 50.0, 5.0)]) == 0
+
+    assert kite.orders == [(SHORT_SYM, "BUY"), (LONG_SYM, "SELL")]
+    row = conn.execute(
+        "SELECT status, exit_reason FROM trade_log WHERE trade_id = ?", (trade_id,)
+    ).fetchone()
+    assert row == ("CLOSED", "TARGET")
+
+
+def _paper_trade(trade_id):
+    return {"trade_id": trade_id, "symbol": "TEST", "mode": "PAPER",
+            "lot_size": 50, "net_credit": 20.0}
+
+
+@pytest.mark.parametrize(
+    "trade_ids",
+    [
+        pytest.param(("test_trade_1",), id="single"),
+        pytest.param(("test_trade_1", "test_trade_2"), id="batch"),
+    ],
+)
+def test_paper_trade_reopened_when_close_fails(conn, monkeypatch, trade_ids):
+    # A DB error after the claim must not leave PAPER trades CLOSING
+    for trade_id in trade_ids:
+        _insert_trade(conn, trade_id=trade_id)
+    monkeypatch.setattr(exits, "_CLOSE_TRADE_SQL", "UPDATE no_such_table SET x = ?")
+
+    closed = ExitManager(kite=None).close_trades(
+        [(_paper_trade(trade_id), "TARGET", 14.0, 5.0) for trade_id in trade_ids]
+    )
+
+    assert closed == 0
+    statuses = [row[0] for row in conn.execute("SELECT status FROM trade_log")]
+    assert statuses == ["OPEN"] * len(trade_ids)
+
+
+def test_recover_closing_trades(conn):
+    # Left CLOSING by a crash: PAPER is reopened, LIVE is left for manual review
+    _insert_trade(conn, trade_id="paper_trade")
+    _insert_trade(conn, trade_id="live_trade", mode="LIVE")
+    conn.execute("UPDATE trade_log SET status = 'CLOSING'")
+    conn.commit()
+
+    assert recover_closing_trades() == 1
+
+    rows = dict(conn.execute("SELECT trade_id, status FROM trade_log").fetchall())
+    assert rows == {"paper_trade": "OPEN", "live_trade": "CLOSING"}
+
+
+def test_legacy_trade_symbols_backfilled(conn):
+    # Trades logged before the leg symbol columns existed get them on init
+    trade_id = _insert_trade(conn, legs=(None, None))
+
+    initialise_database()
+
+    row = conn.execute(
+        "SELECT short_symbol, long_symbol FROM trade_log WHERE trade_id = ?",
+        (trade_id,),
+    ).fetchone()
+    assert row == (SHORT_SYM, LONG_SYM)
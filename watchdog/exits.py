@@ -3,6 +3,7 @@ Exit Manager — Handles position squaring off and P&L logging.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any
 
@@ -12,6 +13,22 @@ import config
 
 logger = logging.getLogger(__name__)
 
+_CLOSE_TRADE_SQL = """
+    UPDATE trade_log
+    SET status = 'CLOSED',
+        exit_time = ?,
+        exit_short_pr = ?,
+        exit_long_pr = ?,
+        pnl = ?,
+        exit_reason = ?
+    WHERE trade_id = ? AND status = 'CLOSING'
+"""
+
+# Claim a trade before any exit order is sent, so a repeated exit signal
+# cannot square off the same position twice (see ExitManager._claim)
+_CLAIM_TRADE_SQL = "UPDATE trade_log SET status = 'CLOSING' WHERE trade_id = ? AND status = 'OPEN'"
+_RELEASE_TRADE_SQL = "UPDATE trade_log SET status = 'OPEN' WHERE trade_id = ? AND status = 'CLOSING'"
+
 
 class ExitManager:
     def __init__(self, kite: KiteClient):
@@ -34,89 +51,25 @@ class ExitManager:
         trade_id = trade["trade_id"]
         symbol = trade["symbol"]
         mode = trade["mode"]
-        lot_size = trade["lot_size"]
-        
+
+        if not self._claim([trade_id]):
+            logger.warning(f"Trade {trade_id} is not OPEN; left unchanged.")
+            return False
+
         logger.info(f"Closing {mode} trade {trade_id} ({symbol}) due to {reason}...")
         
-        if mode == "LIVE":
-            # ── Live Exit ──
-            # Place BUY order for Short leg (Cover)
-            # Place SELL order for Long leg (Sell)
-            try:
-                # 1. Square off Short Leg (Buy back)
-                self.kite.place_order(
-                    tradingsymbol=f"{symbol}{int(trade['short_strike'])}PE" if trade['strategy']=="BULL_PUT" else f"{symbol}{int(trade['short_strike'])}CE", 
-                    # Wait, spread details are in trade_log but symbol construction needs care. 
-                    # Actually, we should store tradingsymbol in DB or reconstruct it.
-                    # Reconstruction is risky if naming changes.
-                    # But we stored strikes. Let's assume standard format or fetch order history?
-                    # Let's verify DB schema. We stored 'short_strike', 'long_strike', 'expiry'.
-                    # We can reconstruct tradingsymbol if we know format.
-                    # Standard: SYMBOL + YY + M + DD + COMP + STRIKE.
-                    # This is painful. Valid way: Store `instrument_token` or `tradingsymbol` in DB.
-                    # I missed `tradingsymbol` columns for legs in Chunk 4 schema. 
-                    # CRITICAL: I need to know the leg symbols to close them.
-                    # For now, I'll rely on reconstruction or Order ID if positions API gives it.
-                    # Better: Reconstruct using `instrument_master` or just `kite.positions()`?
-                    # Watchdog should assume positions exist in Kite for LIVE.
-                    # So we should iterate `kite.positions()` and close matches?
-                    # But for consistency with `trade_log`, we need to link them.
-                    # Let's assume paper mode for now (as user requested).
-                    # For LIVE implementation later, we strictly match `kite.positions()`.
-                     exchange="NFO",
-                     transaction_type="BUY",
-                     quantity=lot_size,
-                     order_type="MARKET",
-                     product="NRML",
-                     variety="regular",
-                     tag=f"EXIT_{trade_id[:8]}"
-                )
-                # 2. Square off Long Leg
-                self.kite.place_order(
-                     exchange="NFO",
-                     transaction_type="SELL",
-                     quantity=lot_size,
-                     order_type="MARKET",
-                     product="NRML",
-                     variety="regular",
-                     tag=f"EXIT_{trade_id[:8]}"
-                )
-            except Exception as e:
-                logger.error(f"Live exit failed for {trade_id}: {e}")
-                # Don't return False yet, try to log what happened?
-                # If Live exit fails, we are in trouble.
-                pass 
-                # Proceed to update DB to CLOSED? No, only if successful.
-                # Since LIVE is dangerous, I will focus on PAPER implementation as requested.
-        
-        # ── P&L Calculation ──
-        # Entry Credit (Received) = Short_Entry - Long_Entry
-        # Exit Debit (Paid) = Short_Exit - Long_Exit
-        # P&L = Entry_Credit - Exit_Debit
-        
-        entry_credit = trade["net_credit"]
-        exit_debit = current_short_pr - current_long_pr
-        
-        # NOTE: For Bear Call, credit/debit logic is same (sell spread, buy back).
-        # We collected `entry_credit`. We pay `exit_debit` to close.
-        pnl = (entry_credit - exit_debit) * lot_size
-        
-        logger.info(f"  P&L: ₹{pnl:.2f} (Credit: {entry_credit:.2f}, Debit: {exit_debit:.2f})")
+        if mode == "LIVE" and not self._square_off_live(trade):
+            self._release([trade_id])
+            logger.error(f"Trade {trade_id} left OPEN; retry on the next cycle.")
+            return False
+
+        pnl = self._calculate_pnl(trade, current_short_pr, current_long_pr)
 
         # ── DB Update ──
         try:
             with get_connection() as conn:
                 conn.execute(
-                    """
-                    UPDATE trade_log
-                    SET status = 'CLOSED',
-                        exit_time = ?,
-                        exit_short_pr = ?,
-                        exit_long_pr = ?,
-                        pnl = ?,
-                        exit_reason = ?
-                    WHERE trade_id = ?
-                    """,
+                    _CLOSE_TRADE_SQL,
                     (
                         datetime.now().isoformat(),
                         current_short_pr,
@@ -130,4 +83,200 @@ class ExitManager:
             return True
         except Exception as e:
             logger.error(f"Failed to close trade in DB: {e}")
+            if mode == "LIVE":
+                # Exit orders already went out; re-sending them would reverse the position
+                logger.critical(f"LIVE trade {trade_id} left CLOSING; reconcile it with the broker.")
+            else:
+                self._release([trade_id])
+            return False
+
+    def close_trades(
+        self,
+        exits: list[tuple[dict[str, Any], str, float, float]],
+    ) -> int:
+        """
+        Square off several trades and update the DB in one transaction.
+
+        exits: (trade, reason, current_short_pr, current_long_pr) tuples,
+               same arguments as close_trade().
+
+        Kite has no basket order endpoint, so LIVE exit orders are submitted
+        concurrently. LIVE trades whose exit orders fail stay OPEN.
+        Repeated entries for one trade are closed once.
+        A single exit goes through close_trade().
+        Returns the number of trades closed in the DB.
+        """
+        unique: dict[str, tuple[dict[str, Any], str, float, float]] = {}
+        for exit_ in exits:
+            unique.setdefault(exit_[0]["trade_id"], exit_)
+
+        if not unique:
+            return 0
+        if len(unique) == 1:
+            return int(self.close_trade(*next(iter(unique.values()))))
+
+        claimed = self._claim(list(unique))
+        for trade_id in unique.keys() - claimed:
+            logger.warning(f"Trade {trade_id} is not OPEN; left unchanged.")
+        exits = [exit_ for trade_id, exit_ in unique.items() if trade_id in claimed]
+        if not exits:
+            return 0
+
+        live_trades = [trade for trade, *_ in exits if trade["mode"] == "LIVE"]
+        failed: set[str] = set()
+        if live_trades:
+            with ThreadPoolExecutor(max_workers=min(10, len(live_trades))) as executor:
+                squared_off = executor.map(self._square_off_live, live_trades)
+                failed = {
+                    trade["trade_id"]
+                    for trade, ok in zip(live_trades, squared_off)
+                    if not ok
+                }
+            self._release(failed)
+            for trade_id in failed:
+                logger.error(f"Trade {trade_id} left OPEN; retry on the next cycle.")
+
+        exit_time = datetime.now().isoformat()
+        rows = []
+        for trade, reason, current_short_pr, current_long_pr in exits:
+            if trade["trade_id"] in failed:
+                continue
+            logger.info(
+                f"Closing {trade['mode']} trade {trade['trade_id']} ({trade['symbol']}) due to {reason}..."
+            )
+            pnl = self._calculate_pnl(trade, current_short_pr, current_long_pr)
+            rows.append(
+                (exit_time, current_short_pr, current_long_pr, pnl, reason, trade["trade_id"])
+            )
+
+        # ── DB Update ──
+        try:
+            with get_connection() as conn:
+                closed = conn.executemany(_CLOSE_TRADE_SQL, rows).rowcount
+            logger.info(f"{closed} trades closed in DB.")
+            return closed
+        except Exception as e:
+            logger.error(f"Failed to close trades in DB: {e}")
+            self._release([trade["trade_id"] for trade, *_ in exits if trade["mode"] != "LIVE"])
+            for trade, *_ in exits:
+                if trade["mode"] == "LIVE" and trade["trade_id"] not in failed:
+                    logger.critical(
+                        f"LIVE trade {trade['trade_id']} left CLOSING; reconcile it with the broker."
+                    )
+            return 0
+
+    @staticmethod
+    def _claim(trade_ids: list[str]) -> set[str]:
+        """
+        Move OPEN trades to CLOSING and return the ids this call now owns.
+
+        Only the owner may place exit orders or close the trade, so an
+        exit signal for a trade already closing or closed is a no-op.
+        """
+        with get_connection() as conn:
+            return {
+                trade_id for trade_id in trade_ids
+                if conn.execute(_CLAIM_TRADE_SQL, (trade_id,)).rowcount == 1
+            }
+
+    @staticmethod
+    def _release(trade_ids) -> None:
+        """Return claimed trades to OPEN, e.g. after their exit orders failed."""
+        if not trade_ids:
+            return
+        try:
+            with get_connection() as conn:
+                conn.executemany(_RELEASE_TRADE_SQL, [(trade_id,) for trade_id in trade_ids])
+        except Exception as e:
+            # recover_closing_trades() reopens PAPER trades on the next start
+            logger.error(f"Failed to reopen trades {sorted(trade_ids)}: {e}")
+
+    def _square_off_live(self, trade: dict[str, Any]) -> bool:
+        """
+        Place the LIVE exit orders for both legs of a trade.
+
+        Returns True if both orders were accepted. On failure the trade
+        must stay OPEN so the watchdog keeps monitoring it.
+        """
+        trade_id = trade["trade_id"]
+        lot_size = trade["lot_size"]
+
+        try:
+            # 1. Square off Short Leg (Buy back)
+            self.kite.place_order(
+                tradingsymbol=trade["short_symbol"],
+                exchange="NFO",
+                transaction_type="BUY",
+                quantity=lot_size,
+                order_type="MARKET",
+                product="NRML",
+                variety="regular",
+                tag=f"EXIT_{trade_id[:8]}"
+            )
+            # 2. Square off Long Leg
+            self.kite.place_order(
+                tradingsymbol=trade["long_symbol"],
+                exchange="NFO",
+                transaction_type="SELL",
+                quantity=lot_size,
+                order_type="MARKET",
+                product="NRML",
+                variety="regular",
+                tag=f"EXIT_{trade_id[:8]}"
+            )
+        except Exception as e:
+            logger.error(f"Live exit failed for {trade_id}: {e}")
             return False
+        return True
+
+    @staticmethod
+    def _calculate_pnl(
+        trade: dict[str, Any],
+        current_short_pr: float,
+        current_long_pr: float,
+    ) -> float:
+        """Realised P&L for closing a trade at the given leg prices."""
+        # ── P&L Calculation ──
+        # Entry Credit (Received) = Short_Entry - Long_Entry
+        # Exit Debit (Paid) = Short_Exit - Long_Exit
+        # P&L = Entry_Credit - Exit_Debit
+
+        lot_size = trade["lot_size"]
+        entry_credit = trade["net_credit"]
+        exit_debit = current_short_pr - current_long_pr
+
+        # NOTE: For Bear Call, credit/debit logic is same (sell spread, buy back).
+        # We collected `entry_credit`. We pay `exit_debit` to close.
+        pnl = (entry_credit - exit_debit) * lot_size
+
+        logger.info(f"  P&L: ₹{pnl:.2f} (Credit: {entry_credit:.2f}, Debit: {exit_debit:.2f})")
+        return pnl
+
+
+def recover_closing_trades() -> int:
+    """
+    Resolve trades left CLOSING by an interrupted exit. Run at startup.
+
+    PAPER trades placed no orders, so they go back to OPEN and are
+    monitored again. LIVE trades may already be squared off at the
+    broker, so they are left CLOSING and reported for manual review.
+    Returns the number of PAPER trades reopened.
+    """
+    with get_connection() as conn:
+        reopened = conn.execute(
+            "UPDATE trade_log SET status = 'OPEN' WHERE status = 'CLOSING' AND mode = 'PAPER'"
+        ).rowcount
+        stuck_live = [
+            row["trade_id"] for row in conn.execute(
+                "SELECT trade_id FROM trade_log WHERE status = 'CLOSING' AND mode = 'LIVE'"
+            )
+        ]
+
+    if reopened:
+        logger.warning(f"Reopened {reopened} PAPER trades left CLOSING by an interrupted exit.")
+    for trade_id in stuck_live:
+        logger.critical(
+            f"LIVE trade {trade_id} is stuck CLOSING; check its exit orders with the "
+            "broker, then set its status to CLOSED or OPEN."
+        )
+    return reopened
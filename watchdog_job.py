@@ -12,7 +12,9 @@ import time
 import schedule
 import sys
 
-from core.kite_client import KiteClient
+from core.kite_client import KiteClient, TokenException
+from db.schema import initialise_database
+from watchdog.exits import recover_closing_trades
 from watchdog.monitor import run_watchdog
 import config
 
@@ -25,21 +27,33 @@ logging.basicConfig(
 logger = logging.getLogger("IV-Sniper-Watchdog")
 
 
+# Reused across cycles. The access token is read from .env once at
+# import, so a fresh client per cycle would not pick up a new token anyway.
+_kite: KiteClient | None = None
+
+
+def _get_kite_client() -> KiteClient | None:
+    """Create and validate the Kite client on first use, then reuse it."""
+    global _kite
+    if _kite is None:
+        kite = KiteClient()
+        # Check token validity (once, not every cycle)
+        # Network errors propagate to job() and are retried next cycle
+        try:
+            kite.margins()
+        except TokenException:
+            logger.error("Token invalid. Aborting cycle.")
+            return None
+        _kite = kite
+    return _kite
+
+
 def job():
     """Wrapper for the monitoring task."""
     try:
         logger.info("Starting monitoring cycle...")
-        kite = KiteClient() # New session each time? Or reuse?
-        # Reuse if possible to avoid login spam?
-        # But token might expire. KiteClient handles session?
-        # KiteClient reads from .env. It's lightweight.
-        # But `kite.margins()` call inside validates token.
-        
-        # Check token validity
-        try:
-            kite.margins()
-        except Exception:
-            logger.error("Token invalid. Aborting cycle.")
+        kite = _get_kite_client()
+        if kite is None:
             return
 
         run_watchdog(kite)
@@ -54,23 +68,30 @@ def main():
     parser.add_argument("--once", action="store_true", help="Run once and exit")
     args = parser.parse_args()
 
+    # Ensure DB exists and trade_log has the leg symbol columns
+    initialise_database()
+    # Reopen / report trades an interrupted exit left CLOSING
+    recover_closing_trades()
+
     logger.info("Watchdog started.")
     
     if args.once:
         job()
         return
 
+    # Run immediately once, before scheduling, so the first 5-minute
+    # interval starts after this cycle finishes rather than during it
+    job()
+
     # Schedule every 5 minutes
     schedule.every(5).minutes.do(job)
     
     logger.info("Scheduled to run every 5 minutes. Press Ctrl+C to stop.")
     
-    # Run immediately once
-    job()
-    
     while True:
         schedule.run_pending()
-        time.sleep(1)
+        # Sleep until the next run is due instead of polling every second
+        time.sleep(max(0.0, schedule.idle_seconds() or 0.0))
 
 
 if __name__ == "__main__":